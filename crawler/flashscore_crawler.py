@@ -9,6 +9,7 @@ from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
 
 from models.match import Sport, Match
+from models.match_io import write_matches
 
 
 class FlashScoreCrawler:
@@ -198,8 +199,4 @@ class FlashScoreCrawler:
 
     @staticmethod
     def write_matches(fpath: str, matches: List[Match]):
-        with open(fpath, 'w+', encoding='utf-8') as f:
-            f.write("date,round,home_team,hosts_score,away_team,guests_score,hosts_periods,guests_periods\n")
-            for match in matches:
-                f.write(str(match))
-                f.write("\n")
+        write_matches(fpath, matches)
@@ -1,30 +1,44 @@
 import os
 from datetime import datetime
 from pathlib import Path
+from fractions import Fraction
 from collections import defaultdict
 
-import pandas as pd
-
 from models.match import Match, Sport
-from typing import List, Dict, Optional, Tuple
+from models.match_io import is_match_data_file, read_matches
+from typing import List, Dict, Optional, Tuple, Callable
 
 
 class Championship:
+    HEAD_TO_HEAD_POINTS = "head_to_head_points"
+    HEAD_TO_HEAD_DIFFERENCE = "head_to_head_difference"
+    SCORE_DIFFERENCE = "score_difference"
+    POINTS_SCORED = "points_scored"
+
+    # criteria used, in order, to rank the teams with the same points per game
+    TIE_BREAKERS = {
+        Sport.FOOTBALL: (HEAD_TO_HEAD_POINTS, HEAD_TO_HEAD_DIFFERENCE, SCORE_DIFFERENCE, POINTS_SCORED),
+        Sport.HANDBALL: (HEAD_TO_HEAD_POINTS, HEAD_TO_HEAD_DIFFERENCE, SCORE_DIFFERENCE, POINTS_SCORED),
+        Sport.BASKETBALL: (HEAD_TO_HEAD_POINTS, HEAD_TO_HEAD_DIFFERENCE, SCORE_DIFFERENCE, POINTS_SCORED),
+        Sport.HOCKEY: (HEAD_TO_HEAD_POINTS, HEAD_TO_HEAD_DIFFERENCE, SCORE_DIFFERENCE, POINTS_SCORED),
+        # volleyball scores are sets: sets difference, then sets won
+        Sport.VOLLEYBALL: (SCORE_DIFFERENCE, POINTS_SCORED),
+    }
 
     def __init__(self, championship_data_file: str):
         if not os.path.isfile(championship_data_file):
             raise FileNotFoundError
-        if not championship_data_file.endswith('.csv'):
-            raise Exception('File extension not supported. Please provide a CSV file.')
+        if not is_match_data_file(championship_data_file):
+            raise Exception('File extension not supported. Please provide a CSV file (optionally gzip/zstd compressed).')
         self.championship_data_file = championship_data_file
         self.matches: List[Match] = []
+        self._cached_matches_count: Optional[int] = None
 
     def load_matches(self) -> None:
         """
         Loads all matches from championship_data_file into self.matches.
         """
-        df = pd.read_csv(self.championship_data_file)
-        for _, row in df.iterrows():
+        for row in read_matches(self.championship_data_file):
             m = Match(
                 sport=Sport(row['sport']),
                 home_team=row['home_team'],
@@ -35,7 +49,7 @@ class Championship:
                 competition_round=row['round'],
             )
 
-            if type(row['home_score_by_period']) is str and type(row['away_score_by_period']) is str:
+            if row['home_score_by_period'] and row['away_score_by_period']:
                 home_score_by_period = row['home_score_by_period'].split('-')
                 away_score_by_period = row['away_score_by_period'].split('-')
                 for i in range(len(home_score_by_period)):
@@ -128,44 +142,123 @@ class Championship:
 
         return middle_datetime
 
+    def _reset_standings_cache(self) -> None:
+        self._chronological_matches: List[Match] = sorted(self.matches, key=lambda match: match.date)
+        self._cached_matches_count = len(self.matches)
+        self._cached_limit_date: Optional[datetime] = None
+        self._applied_matches = 0
+        self._cumulative_standings: Dict[str, Dict[str, int]] = {}
+        self._head_to_head: Dict[Tuple[str, str], List[int]] = {}
+
+        # teams are listed in order of their first appearance
+        for match in self.matches:
+            for team in (match.home_team, match.away_team):
+                if team not in self._cumulative_standings:
+                    self._cumulative_standings[team] = {"points": 0, "games": 0, "scored": 0, "conceded": 0}
+
+    def _advance_standings(self, limit_date: datetime) -> None:
+        """
+        Brings the cumulative standings and the head-to-head records up to limit_date (included).
+
+        Consecutive calls with increasing dates (e.g. round after round) only process the matches played
+        in between. The cache is rebuilt if the date goes backwards or if new matches have been loaded.
+        """
+        if self._cached_matches_count != len(self.matches) or \
+                (self._cached_limit_date is not None and limit_date < self._cached_limit_date):
+            self._reset_standings_cache()
+
+        self._cached_limit_date = limit_date
+        while self._applied_matches < len(self._chronological_matches) and \
+                self._chronological_matches[self._applied_matches].date <= limit_date:
+            match = self._chronological_matches[self._applied_matches]
+            points = match.compute_points()
+            for team, opponent, team_points, scored, conceded in (
+                    (match.home_team, match.away_team, points[0], match.home_total_score, match.away_total_score),
+                    (match.away_team, match.home_team, points[1], match.away_total_score, match.home_total_score),
+            ):
+                team_standings = self._cumulative_standings[team]
+                team_standings["points"] += team_points
+                team_standings["games"] += 1
+                team_standings["scored"] += scored
+                team_standings["conceded"] += conceded
+
+                head_to_head = self._head_to_head.setdefault((team, opponent), [0, 0, 0])
+                head_to_head[0] += team_points
+                head_to_head[1] += scored
+                head_to_head[2] += conceded
+            self._applied_matches += 1
+
     def compute_standings_before_round(self, championship_round: int) -> Dict[str, Dict[str, int]]:
 
         previous_round_matches = self.get_matches_from_round(championship_round - 1)
         limit_date = self.get_last_match_date_from_round(previous_round_matches)
 
         # all matches played before the limit_date will be taken into consideration
+        self._advance_standings(limit_date)
+
+        standings = {
+            team: dict(team_standings)
+            for team, team_standings in self._cumulative_standings.items()
+            if team_standings["games"] != 0
+        }
+        return self.rank_standings(
+            standings,
+            self.matches[0].sport,
+            lambda team, opponent: self._head_to_head.get((team, opponent), (0, 0, 0))
+        )
 
-        standings = {}
-        for match in self.matches:
-            if match.home_team not in standings:
-                standings[match.home_team] = {
-                    "points": 0,
-                    "games": 0
-                }
-
-            if match.away_team not in standings:
-                standings[match.away_team] = {
-                    "points": 0,
-                    "games": 0
-                }
-
-            if match.date <= limit_date:
-                points = match.compute_points()
-                standings[match.home_team]["points"] += points[0]
-                standings[match.away_team]["points"] += points[1]
-                standings[match.home_team]["games"] += 1
-                standings[match.away_team]["games"] += 1
-
-        standings = dict(sorted(
-            {
-                key: value
-                for key, value in standings.items()
-                if value["games"] != 0
-            }.items(),
-            key=lambda item: -(item[1]["points"] / item[1]["games"])
-        ))
+    @staticmethod
+    def rank_standings(
+            standings: Dict[str, Dict[str, int]],
+            sport: Sport,
+            head_to_head: Callable[[str, str], Tuple[int, int, int]],
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Orders the standings by points per game. Teams with the same points per game are ordered by the
+        tie-breaking criteria of the sport (see TIE_BREAKERS), applied to the group of tied teams.
+        Teams that remain level keep their order in the given standings.
 
-        return standings
+        head_to_head(team, opponent) returns the (points, scored, conceded) of team in its matches against opponent.
+        """
+        tied_groups = defaultdict(list)
+        for team, team_standings in standings.items():
+            tied_groups[Fraction(team_standings["points"], team_standings["games"])].append(team)
+
+        criteria = Championship.TIE_BREAKERS.get(sport, ())
+        ranking = []
+        for points_per_game in sorted(tied_groups.keys(), reverse=True):
+            group = tied_groups[points_per_game]
+            if len(group) > 1 and len(criteria) > 0:
+                group = sorted(group, key=lambda team: Championship._tie_breaking_key(
+                    team, group, standings, criteria, head_to_head
+                ))
+            ranking.extend(group)
+
+        return {team: standings[team] for team in ranking}
+
+    @staticmethod
+    def _tie_breaking_key(
+            team: str,
+            group: List[str],
+            standings: Dict[str, Dict[str, int]],
+            criteria: Tuple[str, ...],
+            head_to_head: Callable[[str, str], Tuple[int, int, int]],
+    ) -> Tuple[int, ...]:
+        # mini-table of the team against the other teams of the tied group
+        head_to_head_points = head_to_head_difference = 0
+        for opponent in group:
+            if opponent != team:
+                points, scored, conceded = head_to_head(team, opponent)
+                head_to_head_points += points
+                head_to_head_difference += scored - conceded
+
+        values = {
+            Championship.HEAD_TO_HEAD_POINTS: head_to_head_points,
+            Championship.HEAD_TO_HEAD_DIFFERENCE: head_to_head_difference,
+            Championship.SCORE_DIFFERENCE: standings[team]["scored"] - standings[team]["conceded"],
+            Championship.POINTS_SCORED: standings[team]["scored"],
+        }
+        return tuple(-values[criterion] for criterion in criteria)
 
     @staticmethod
     def extract_first_k_teams(standings: Dict[str, Dict[str, int]], k: int) -> List[str]:
@@ -177,8 +270,10 @@ class Championship:
 
     @staticmethod
     def extract_last_k_teams(standings: Dict[str, Dict[str, int]], k: int) -> List[str]:
+        # teams with the same points per game are taken in reverse standings order, so that ties are broken
+        # the same way as in the standings
         sorted_standings = dict(sorted(
-            standings.items(),
+            reversed(standings.items()),
             key=lambda item: item[1]["points"] / item[1]["games"]
         ))
         return list(sorted_standings.keys())[:k]
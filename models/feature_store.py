@@ -0,0 +1,259 @@
+import os
+import csv
+import json
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+from models.match import Match
+
+
+class _TeamState:
+    """
+    Rolling state of a team, updated in O(1) after each of its matches.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.recent: deque = deque()  # (result, points, point_diff) of the last `window` matches
+        self.recent_points = 0
+        self.recent_point_diff = 0
+        self.games = 0
+        self.last_match_date: Optional[datetime] = None
+        self.splits = {
+            'home': {'games': 0, 'wins': 0, 'point_diff': 0},
+            'away': {'games': 0, 'wins': 0, 'point_diff': 0},
+        }
+
+    def add(self, result: str, points: int, point_diff: int, venue: str, match_date: datetime) -> None:
+        self.recent.append((result, points, point_diff))
+        self.recent_points += points
+        self.recent_point_diff += point_diff
+        if len(self.recent) > self.window:
+            _, old_points, old_point_diff = self.recent.popleft()
+            self.recent_points -= old_points
+            self.recent_point_diff -= old_point_diff
+
+        self.games += 1
+        self.last_match_date = match_date
+        self.splits[venue]['games'] += 1
+        self.splits[venue]['wins'] += int(result == 'W')
+        self.splits[venue]['point_diff'] += point_diff
+
+    def snapshot(self) -> Dict:
+        return {
+            'date': self.last_match_date,
+            'games': self.games,
+            'last_k_results': ''.join(result for result, _, _ in self.recent),
+            'last_k_points': self.recent_points,
+            'last_k_point_diff': self.recent_point_diff,
+            'home_games': self.splits['home']['games'],
+            'home_wins': self.splits['home']['wins'],
+            'home_point_diff': self.splits['home']['point_diff'],
+            'away_games': self.splits['away']['games'],
+            'away_wins': self.splits['away']['wins'],
+            'away_point_diff': self.splits['away']['point_diff'],
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'recent': list(self.recent),
+            'games': self.games,
+            'last_match_date': self.last_match_date.strftime(TeamFeatureStore.DATE_FORMAT),
+            'splits': self.splits,
+        }
+
+    @classmethod
+    def from_dict(cls, window: int, data: Dict) -> '_TeamState':
+        state = cls(window)
+        state.recent = deque(tuple(item) for item in data['recent'])
+        state.recent_points = sum(points for _, points, _ in state.recent)
+        state.recent_point_diff = sum(point_diff for _, _, point_diff in state.recent)
+        state.games = data['games']
+        state.last_match_date = datetime.strptime(data['last_match_date'], TeamFeatureStore.DATE_FORMAT)
+        state.splits = data['splits']
+        return state
+
+
+class TeamFeatureStore:
+    """
+    Per-team rolling form features of a championship, computed in a single pass over the matches in
+    chronological order and persisted next to the championship data file (<league>.csv.features).
+
+    After each match, a snapshot of the team features (including that match) is stored:
+        - games: matches played so far
+        - last_k_results: results (W/D/L) of the last k matches, oldest first
+        - last_k_points, last_k_point_diff: championship points and score differential over the last k matches
+        - home_*/away_*: games, wins and score differential of the home and away matches played so far
+
+    The rolling state of every team is persisted as well (<league>.csv.features.state), so matches appended
+    later to the championship are ingested incrementally, without replaying the season.
+    """
+
+    FEATURES_SUFFIX = '.features'
+    STATE_SUFFIX = '.features.state'
+    DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+    FIELDS = [
+        'team', 'date', 'games', 'last_k_results', 'last_k_points', 'last_k_point_diff',
+        'home_games', 'home_wins', 'home_point_diff', 'away_games', 'away_wins', 'away_point_diff',
+    ]
+
+    def __init__(self, window: int = 5):
+        self.window = window
+        self._reset()
+
+    def _reset(self) -> None:
+        self.teams: Dict[str, _TeamState] = {}
+        self.snapshots: Dict[str, List[Dict]] = {}
+        self.snapshot_dates: Dict[str, List[datetime]] = {}
+        self.rows: List[Tuple[str, Dict]] = []  # (team, snapshot) in chronological order
+        self.saved_rows = 0
+        self.processed_matches = 0
+        self.last_processed_date: Optional[datetime] = None
+
+    @staticmethod
+    def features_file(championship_data_file: str) -> str:
+        return championship_data_file + TeamFeatureStore.FEATURES_SUFFIX
+
+    @staticmethod
+    def state_file(championship_data_file: str) -> str:
+        return championship_data_file + TeamFeatureStore.STATE_SUFFIX
+
+    def update(self, matches: List[Match]) -> int:
+        """
+        Ingests the matches played after the last processed match and returns how many were ingested.
+
+        matches must contain all the championship matches (e.g. Championship.matches), in any order.
+        If some unseen matches were played before the last processed match, the features are rebuilt from scratch.
+        """
+        chronological_matches = sorted(matches, key=lambda match: match.date)
+        first_new_match = 0
+        if self.last_processed_date is not None:
+            first_new_match = bisect_right(
+                chronological_matches, self.last_processed_date, key=lambda match: match.date
+            )
+            if first_new_match != self.processed_matches:
+                self._reset()
+                first_new_match = 0
+
+        for match in chronological_matches[first_new_match:]:
+            self._add_match(match)
+
+        return len(chronological_matches) - first_new_match
+
+    def _add_match(self, match: Match) -> None:
+        home_points, away_points = match.compute_points()
+        winner = match.get_winner()
+        point_diff = match.home_total_score - match.away_total_score
+
+        for team, points, diff, venue in (
+                (match.home_team, home_points, point_diff, 'home'),
+                (match.away_team, away_points, -point_diff, 'away'),
+        ):
+            result = 'D' if winner == Match.draw() else ('W' if winner == team else 'L')
+            if team not in self.teams:
+                self.teams[team] = _TeamState(self.window)
+                self.snapshots[team] = []
+                self.snapshot_dates[team] = []
+            self.teams[team].add(result, points, diff, venue, match.date)
+            snapshot = self.teams[team].snapshot()
+            self.snapshots[team].append(snapshot)
+            self.snapshot_dates[team].append(match.date)
+            self.rows.append((team, snapshot))
+
+        self.processed_matches += 1
+        self.last_processed_date = match.date
+
+    def features_as_of(self, team: str, as_of_date: datetime) -> Optional[Dict]:
+        """
+        Returns the features of the team using only the matches played strictly before as_of_date,
+        together with its rest days, or None if the team has not played before that date.
+        """
+        if team not in self.snapshots:
+            return None
+
+        position = bisect_left(self.snapshot_dates[team], as_of_date)
+        if position == 0:
+            return None
+
+        features = dict(self.snapshots[team][position - 1])
+        features['rest_days'] = (as_of_date - features['date']).days
+        return features
+
+    def match_features(self, match: Match) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Returns the pre-match features of the home and away teams.
+        """
+        return self.features_as_of(match.home_team, match.date), self.features_as_of(match.away_team, match.date)
+
+    def save(self, championship_data_file: str) -> None:
+        """
+        Persists the features and the rolling state next to championship_data_file.
+        Only the snapshots computed since the last save are appended to an existing features file.
+        """
+        append = self.saved_rows > 0 and os.path.isfile(self.features_file(championship_data_file))
+        with open(self.features_file(championship_data_file), 'a' if append else 'w+',
+                  encoding='utf8', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=TeamFeatureStore.FIELDS)
+            if not append:
+                writer.writeheader()
+            for team, snapshot in self.rows[self.saved_rows if append else 0:]:
+                writer.writerow({**snapshot, 'team': team, 'date': snapshot['date'].strftime(self.DATE_FORMAT)})
+        self.saved_rows = len(self.rows)
+
+        # the state is written last: features rows not covered by the state are detected when loading.
+        # It is written to a temporary file renamed once complete, so an interrupted save keeps the previous state
+        tmp_state_file = self.state_file(championship_data_file) + '.tmp'
+        with open(tmp_state_file, 'w+', encoding='utf8') as f:
+            json.dump({
+                'window': self.window,
+                'rows': self.saved_rows,
+                'processed_matches': self.processed_matches,
+                'last_processed_date': self.last_processed_date.strftime(self.DATE_FORMAT)
+                if self.last_processed_date is not None else None,
+                'teams': {team: state.to_dict() for team, state in self.teams.items()},
+            }, f)
+        os.replace(tmp_state_file, self.state_file(championship_data_file))
+
+    @classmethod
+    def load(cls, championship_data_file: str, window: int = 5) -> 'TeamFeatureStore':
+        """
+        Loads the features persisted next to championship_data_file. An empty store is returned
+        if nothing was persisted yet, if the features were computed with a different window
+        or if the features file does not match the persisted state (e.g. an interrupted save).
+        """
+        store = cls(window)
+        features_file, state_file = cls.features_file(championship_data_file), cls.state_file(championship_data_file)
+        if not os.path.isfile(features_file) or not os.path.isfile(state_file):
+            return store
+
+        with open(state_file, 'r', encoding='utf8') as f:
+            state = json.load(f)
+        if state['window'] != window:
+            return store
+
+        with open(features_file, 'r', encoding='utf8', newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                # a row cut by an interrupted save
+                if None in row.values():
+                    return cls(window)
+                team = row.pop('team')
+                snapshot = {
+                    key: value if key == 'last_k_results' else int(value)
+                    for key, value in row.items() if key != 'date'
+                }
+                snapshot['date'] = datetime.strptime(row['date'], cls.DATE_FORMAT)
+                store.snapshots.setdefault(team, []).append(snapshot)
+                store.snapshot_dates.setdefault(team, []).append(snapshot['date'])
+                store.rows.append((team, snapshot))
+
+        if len(store.rows) != state['rows']:
+            return cls(window)
+
+        store.saved_rows = len(store.rows)
+        store.teams = {team: _TeamState.from_dict(window, data) for team, data in state['teams'].items()}
+        store.processed_matches = state['processed_matches']
+        if state['last_processed_date'] is not None:
+            store.last_processed_date = datetime.strptime(state['last_processed_date'], cls.DATE_FORMAT)
+        return store
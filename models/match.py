@@ -15,6 +15,16 @@ class Sport(Enum):
 class Match:
     _DRAW = "Draw"
 
+    _POINT_SYSTEM = {
+        Sport.FOOTBALL: (3, 1),  # 3 points for a win, 1 point each for a draw
+        Sport.HANDBALL: (2, 1),  # 2 points for a win, 1 point each for a draw
+        Sport.BASKETBALL: (2, 0),  # 2 points for a win, no draw
+        Sport.HOCKEY: (2, 1),  # 2 points for a win, 1 point each for a draw
+        Sport.VOLLEYBALL: (3, (2, 1)),  # if score is 3-0 or 3-1, 3 points for a win
+                                        # if score is 3-2, 2 points for a win and 1 point for a loss
+        Sport.TENNIS: (0, 0)  # typically not point-based, so 0 for both
+    }
+
     def __init__(
             self,
             sport: Sport,
@@ -76,20 +86,10 @@ class Match:
 
     def compute_points(self) -> Tuple[int, int]:
 
-        point_system = {
-            Sport.FOOTBALL: (3, 1),  # 3 points for a win, 1 point each for a draw
-            Sport.HANDBALL: (2, 1),  # 2 points for a win, 1 point each for a draw
-            Sport.BASKETBALL: (2, 0),  # 2 points for a win, no draw
-            Sport.HOCKEY: (2, 1),  # 2 points for a win, 1 point each for a draw
-            Sport.VOLLEYBALL: (3, (2, 1)),  # if score is 3-0 or 3-1, 3 points for a win
-                                            # if score is 3-2, 2 points for a win and 1 point for a loss
-            Sport.TENNIS: (0, 0)  # typically not point-based, so 0 for both
-        }
-
         if self.sport == Sport.TENNIS:
             raise Exception("compute_points() method does not handle volleyball or tennis matches.")
 
-        victory_points, draw_points = point_system[self.sport]
+        victory_points, draw_points = self._POINT_SYSTEM[self.sport]
         defeat_points = 0
 
         if self.sport == Sport.VOLLEYBALL and self.home_total_score + self.away_total_score == 5:
@@ -0,0 +1,228 @@
+import io
+import os
+import csv
+import gzip
+import json
+import zlib
+import uuid
+import hashlib
+from typing import List, Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+from models.match import Match
+
+# extension of the match data files for each supported compression
+COMPRESSIONS = {
+    None: '.csv',
+    'gzip': '.csv.gz',
+    'zstd': '.csv.zst',
+}
+MANIFEST_SUFFIX = '.manifest'
+MATCH_FIELDS = [
+    'sport', 'date', 'round', 'home_team', 'away_team',
+    'home_total_score', 'away_total_score', 'home_score_by_period', 'away_score_by_period',
+]
+
+_BUFFER_SIZE = 1024 * 1024
+# decompression, decoding and parsing errors of a damaged data file
+_CORRUPTION_ERRORS = (EOFError, gzip.BadGzipFile, zlib.error, UnicodeDecodeError, csv.Error) + \
+    ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+class CorruptedDataFileError(Exception):
+    """
+    Raised when a match data file cannot be decompressed or does not match its manifest.
+    """
+
+
+class _HashingFile(io.RawIOBase):
+    """
+    Raw file wrapper computing the SHA-256 of the bytes written through it.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return self.raw.writable()
+
+    def write(self, data) -> int:
+        count = self.raw.write(data)
+        self.sha256.update(memoryview(data)[:count])
+        return count
+
+
+def get_compression(fpath: str) -> Optional[str]:
+    for compression, extension in sorted(COMPRESSIONS.items(), key=lambda item: -len(item[1])):
+        if fpath.endswith(extension):
+            return compression
+    raise Exception(f'File extension not supported. Please provide one of {list(COMPRESSIONS.values())} files.')
+
+
+def is_match_data_file(fpath: str) -> bool:
+    return any(fpath.endswith(extension) for extension in COMPRESSIONS.values())
+
+
+def match_data_file_stem(fpath: str) -> str:
+    """
+    Returns the file name without the data extension (e.g. .results/basketball/2022-2023/spain-acb.csv.gz -> spain-acb).
+    """
+    file_name = os.path.basename(fpath)
+    return file_name[:-len(COMPRESSIONS[get_compression(file_name)])]
+
+
+def match_data_file_path(directory: str, stem: str, compression: Optional[str] = None) -> str:
+    if compression not in COMPRESSIONS:
+        raise Exception(f'Compression "{compression}" not supported. Please use one of {list(COMPRESSIONS.keys())}.')
+    return os.path.join(directory, stem + COMPRESSIONS[compression])
+
+
+def manifest_path(fpath: str) -> str:
+    return fpath + MANIFEST_SUFFIX
+
+
+def _check_compression_support(compression: Optional[str]) -> None:
+    if compression == 'zstd' and zstandard is None:
+        raise Exception('zstd compression requires the "zstandard" package. Please install it or use gzip.')
+
+
+def _temporary_path(fpath: str) -> str:
+    """
+    Returns a random hidden file path in the directory of fpath, to be opened in exclusive creation mode ('x').
+    Unlike tempfile.mkstemp() (owner only), the file then gets the default permissions of the process umask.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(fpath)), f'.{uuid.uuid4().hex}.tmp')
+
+
+def write_matches(fpath: str, matches: List[Match]) -> None:
+    """
+    Writes the matches to fpath, compressed according to its extension (.csv, .csv.gz or .csv.zst).
+
+    The rows are streamed into a temporary file of the same directory, which is atomically renamed to fpath
+    once complete, so fpath never holds a partially written file. The row count and the checksum of the file
+    are then recorded in <fpath>.manifest and checked by read_matches() and is_complete().
+    """
+    compression = get_compression(fpath)
+    _check_compression_support(compression)
+
+    tmp_fpath = _temporary_path(fpath)
+    raw = open(tmp_fpath, 'xb', buffering=0)
+    try:
+        with raw:
+            hashing_file = _HashingFile(raw)
+            buffered = io.BufferedWriter(hashing_file, buffer_size=_BUFFER_SIZE)
+            if compression == 'gzip':
+                stream = gzip.GzipFile(fileobj=buffered, mode='wb', compresslevel=6, mtime=0)
+            elif compression == 'zstd':
+                stream = zstandard.ZstdCompressor(level=9).stream_writer(buffered, closefd=False)
+            else:
+                stream = buffered
+
+            text = io.TextIOWrapper(stream, encoding='utf8', newline='', write_through=False)
+            writer = csv.DictWriter(text, fieldnames=MATCH_FIELDS)
+            writer.writeheader()
+            writer.writerows(match.to_dict() for match in matches)
+
+            text.flush()
+            text.detach()
+            if stream is not buffered:
+                stream.close()
+            buffered.flush()
+            os.fsync(raw.fileno())
+
+        os.replace(tmp_fpath, fpath)
+    except BaseException:
+        if os.path.exists(tmp_fpath):
+            os.remove(tmp_fpath)
+        raise
+
+    _write_manifest(fpath, {
+        'rows': len(matches),
+        'sha256': hashing_file.sha256.hexdigest(),
+        'compression': compression,
+    })
+
+
+def _write_manifest(fpath: str, manifest: Dict) -> None:
+    tmp_fpath = _temporary_path(fpath)
+    with open(tmp_fpath, 'x', encoding='utf8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_fpath, manifest_path(fpath))
+
+
+def read_manifest(fpath: str) -> Optional[Dict]:
+    """
+    Returns the manifest of fpath, or None for files written before manifests were introduced.
+    """
+    if not os.path.isfile(manifest_path(fpath)):
+        return None
+    with open(manifest_path(fpath), 'r', encoding='utf8') as f:
+        return json.load(f)
+
+
+def read_matches(fpath: str) -> Iterator[Dict[str, str]]:
+    """
+    Streams the rows of a match data file written by write_matches(), decompressing it according to its extension.
+
+    If the file has a manifest, its checksum is verified before any row is returned and its row count once all
+    the rows have been read. CorruptedDataFileError is raised on mismatch (e.g. a truncated file) and when the file
+    cannot be decompressed or parsed.
+    """
+    compression = get_compression(fpath)
+    _check_compression_support(compression)
+    manifest = read_manifest(fpath)
+    if manifest is not None and _file_sha256(fpath) != manifest['sha256']:
+        raise CorruptedDataFileError(f'{fpath} is corrupted: checksum mismatch.')
+
+    with open(fpath, 'rb', buffering=_BUFFER_SIZE) as buffered:
+        if compression == 'gzip':
+            stream = gzip.GzipFile(fileobj=buffered, mode='rb')
+        elif compression == 'zstd':
+            stream = io.BufferedReader(
+                zstandard.ZstdDecompressor().stream_reader(buffered, closefd=False), buffer_size=_BUFFER_SIZE
+            )
+        else:
+            stream = buffered
+
+        rows_count = 0
+        try:
+            reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf8', newline=''))
+            for row in reader:
+                # DictReader fills the missing fields with None and stores the extra ones under the None key
+                if None in row or None in row.values():
+                    raise CorruptedDataFileError(f'{fpath} is corrupted: malformed row at line {reader.line_num}.')
+                rows_count += 1
+                yield row
+        except _CORRUPTION_ERRORS as e:
+            raise CorruptedDataFileError(f'{fpath} is corrupted: {e}.')
+
+    if manifest is not None and rows_count != manifest['rows']:
+        raise CorruptedDataFileError(f'{fpath} is corrupted: read {rows_count} rows, expected {manifest["rows"]}.')
+
+
+def _file_sha256(fpath: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(fpath, 'rb') as f:
+        while chunk := f.read(_BUFFER_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def is_complete(fpath: str) -> bool:
+    """
+    Checks that fpath exists and, if it has a manifest, that its checksum matches the recorded one.
+    """
+    if not os.path.isfile(fpath):
+        return False
+
+    manifest = read_manifest(fpath)
+    if manifest is None:
+        # write_matches() renames the data file before writing its manifest, so the data file is complete
+        return True
+
+    return _file_sha256(fpath) == manifest['sha256']
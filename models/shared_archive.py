@@ -0,0 +1,353 @@
+import os
+from collections.abc import Sequence
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+
+from models.championship import Championship
+from models.match import Match, Sport
+from models.match_io import CorruptedDataFileError, is_match_data_file, match_data_file_stem
+
+_ALIGNMENT = 8
+
+
+class SharedArchive:
+    """
+    Columnar copy of the championships of a sport directory (<sport_dir>/<season>/<league>.csv), decoded once
+    into a single shared memory block which other processes attach to without copying the data.
+
+    Every match is a row of the following arrays, the matches of a championship being contiguous:
+        home_team, away_team: indices in the teams dictionary
+        round: index in the rounds dictionary
+        date: match date (datetime64[s])
+        home_total_score, away_total_score, home_points, away_points
+        periods_offset: position of the match period scores in home_periods/away_periods
+
+    The creator process owns the shared memory block and releases it with close() (or by using
+    the archive as a context manager). Worker processes receive the small handle() dictionary
+    and call SharedArchive.attach(handle).
+    """
+
+    def __init__(self, shared_memory: SharedMemory, layout: Dict, owner: bool):
+        self.shared_memory = shared_memory
+        self.layout = layout
+        self.owner = owner
+        self.teams: List[str] = layout['teams']
+        self.rounds: List[str] = layout['rounds']
+        self.team_ids = {team: i for i, team in enumerate(self.teams)}
+        self.round_ids = {round_label: i for i, round_label in enumerate(self.rounds)}
+        # round number for each round label ("ROUND 5" -> 5), 0 for other competition stages
+        self.round_numbers = np.array(
+            [int(label.split(' ')[1]) if label.startswith('ROUND ') else 0 for label in self.rounds], dtype=np.int64
+        )
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shared_memory.buf, offset=offset)
+            for name, (dtype, shape, offset) in layout['arrays'].items()
+        }
+
+    @classmethod
+    def create(cls, sport_data_dir: str) -> 'SharedArchive':
+        """
+        Loads every championship of sport_data_dir, one at a time, into a new shared memory block.
+        Corrupted data files are skipped and reported in corrupted_files.
+        """
+        team_ids: Dict[str, int] = {}
+        round_ids: Dict[str, int] = {}
+        columns: Dict[str, List] = {name: [] for name in (
+            'home_team', 'away_team', 'round', 'date', 'home_total_score', 'away_total_score',
+            'home_points', 'away_points', 'periods_offset', 'home_periods', 'away_periods',
+        )}
+        championships = []
+        corrupted_files = []
+
+        for season_data in sorted(os.listdir(sport_data_dir)):
+            season_data_dir = os.path.join(sport_data_dir, season_data)
+            for file in sorted(os.listdir(season_data_dir)):
+                if not is_match_data_file(file):
+                    continue
+
+                championship_data_fpath = os.path.join(season_data_dir, file)
+                championship = Championship(championship_data_fpath)
+                try:
+                    championship.load_matches()
+                except CorruptedDataFileError as e:
+                    corrupted_files.append(str(e))
+                    continue
+                if len(championship.matches) == 0:
+                    continue
+
+                start = len(columns['date'])
+                for match in championship.matches:
+                    columns['home_team'].append(team_ids.setdefault(match.home_team, len(team_ids)))
+                    columns['away_team'].append(team_ids.setdefault(match.away_team, len(team_ids)))
+                    columns['round'].append(round_ids.setdefault(match.round, len(round_ids)))
+                    columns['date'].append(match.date)
+                    columns['home_total_score'].append(match.home_total_score)
+                    columns['away_total_score'].append(match.away_total_score)
+                    home_points, away_points = match.compute_points()
+                    columns['home_points'].append(home_points)
+                    columns['away_points'].append(away_points)
+                    columns['periods_offset'].append(len(columns['home_periods']))
+                    columns['home_periods'].extend(int(score) for score in match.home_score_by_period)
+                    columns['away_periods'].extend(int(score) for score in match.away_score_by_period)
+
+                championships.append({
+                    'file': championship_data_fpath,
+                    'season': season_data,
+                    'league': match_data_file_stem(file),
+                    'sport': championship.matches[0].sport.value,
+                    'start': start,
+                    'stop': len(columns['date']),
+                })
+        columns['periods_offset'].append(len(columns['home_periods']))
+
+        arrays = {
+            'home_team': np.array(columns['home_team'], dtype=np.int32),
+            'away_team': np.array(columns['away_team'], dtype=np.int32),
+            'round': np.array(columns['round'], dtype=np.int32),
+            'date': np.array(columns['date'], dtype='datetime64[s]'),
+            'home_total_score': np.array(columns['home_total_score'], dtype=np.int32),
+            'away_total_score': np.array(columns['away_total_score'], dtype=np.int32),
+            'home_points': np.array(columns['home_points'], dtype=np.int8),
+            'away_points': np.array(columns['away_points'], dtype=np.int8),
+            'periods_offset': np.array(columns['periods_offset'], dtype=np.int64),
+            'home_periods': np.array(columns['home_periods'], dtype=np.int32),
+            'away_periods': np.array(columns['away_periods'], dtype=np.int32),
+        }
+
+        layout_arrays = {}
+        size = 0
+        for name, array in arrays.items():
+            layout_arrays[name] = (array.dtype.str, array.shape, size)
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        shared_memory = SharedMemory(create=True, size=max(size, 1))
+        archive = cls(shared_memory, {
+            'arrays': layout_arrays,
+            'teams': list(team_ids.keys()),
+            'rounds': list(round_ids.keys()),
+            'championships': championships,
+            'corrupted_files': corrupted_files,
+        }, owner=True)
+        for name, array in arrays.items():
+            archive.arrays[name][...] = array
+        return archive
+
+    def handle(self) -> Dict:
+        return {'name': self.shared_memory.name, 'layout': self.layout}
+
+    @classmethod
+    def attach(cls, handle: Dict) -> 'SharedArchive':
+        try:
+            shared_memory = SharedMemory(name=handle['name'], track=False)
+        except TypeError:
+            # before Python 3.13, attaching always registers the block to the resource tracker; worker processes
+            # share the tracker of the creator process, where the block is already registered
+            shared_memory = SharedMemory(name=handle['name'])
+        return cls(shared_memory, handle['layout'], owner=False)
+
+    def close(self) -> None:
+        self.arrays = {}
+        self.shared_memory.close()
+        if self.owner:
+            self.shared_memory.unlink()
+
+    def __enter__(self) -> 'SharedArchive':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def championships(self) -> List[Dict]:
+        return self.layout['championships']
+
+    @property
+    def corrupted_files(self) -> List[str]:
+        return self.layout['corrupted_files']
+
+    def get_championship(self, index: int) -> 'SharedChampionship':
+        return SharedChampionship(self, index)
+
+
+class _SharedMatches(Sequence):
+    """
+    Read-only sequence of the matches of a shared championship, materialized as Match objects on access.
+    """
+
+    def __init__(self, championship: 'SharedChampionship'):
+        self.championship = championship
+
+    def __len__(self) -> int:
+        return self.championship.stop - self.championship.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.championship.get_match(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('match index out of range')
+        return self.championship.get_match(index)
+
+
+class SharedChampionship(Championship):
+    """
+    Championship backed by the columns of a SharedArchive.
+
+    The queries used by the analyses (round matches, last round, standings) run directly on the shared arrays;
+    the other Championship methods work on self.matches, which materializes the matches on access.
+    """
+
+    def __init__(self, archive: SharedArchive, index: int):
+        info = archive.championships[index]
+        self.archive = archive
+        self.championship_data_file = info['file']
+        self.season = info['season']
+        self.league = info['league']
+        self.sport = Sport(info['sport'])
+        self.start, self.stop = info['start'], info['stop']
+        self.matches = _SharedMatches(self)
+
+        self._home_team = archive.arrays['home_team'][self.start:self.stop]
+        self._away_team = archive.arrays['away_team'][self.start:self.stop]
+        self._round = archive.arrays['round'][self.start:self.stop]
+        self._date = archive.arrays['date'][self.start:self.stop]
+        self._home_points = archive.arrays['home_points'][self.start:self.stop]
+        self._away_points = archive.arrays['away_points'][self.start:self.stop]
+        self._home_total_score = archive.arrays['home_total_score'][self.start:self.stop]
+        self._away_total_score = archive.arrays['away_total_score'][self.start:self.stop]
+
+        # the standings are computed on the teams of the championship only, numbered in order of their first
+        # appearance (as in Championship.compute_standings_before_round()) instead of by archive team id
+        appearances = np.column_stack((self._home_team, self._away_team)).ravel()
+        team_ids, first_appearance, inverse = np.unique(appearances, return_index=True, return_inverse=True)
+        appearance_order = np.argsort(first_appearance)
+        local_ids = np.empty_like(appearance_order)
+        local_ids[appearance_order] = np.arange(len(appearance_order))
+        self._team_ids = team_ids[appearance_order]
+        self._local_team_ids = {archive.teams[team_id]: i for i, team_id in enumerate(self._team_ids)}
+        self._local_home_team, self._local_away_team = local_ids[inverse].reshape(-1, 2).T
+        self._reset_standings_cache()
+
+    def load_matches(self) -> None:
+        # matches are already loaded in the shared archive
+        pass
+
+    def get_match(self, index: int) -> Match:
+        arrays, i = self.archive.arrays, self.start + index
+        m = Match(
+            sport=self.sport,
+            home_team=self.archive.teams[arrays['home_team'][i]],
+            away_team=self.archive.teams[arrays['away_team'][i]],
+            home_total_score=int(arrays['home_total_score'][i]),
+            away_total_score=int(arrays['away_total_score'][i]),
+            match_date=arrays['date'][i].item(),
+            competition_round=self.archive.rounds[arrays['round'][i]],
+        )
+        periods_start, periods_stop = arrays['periods_offset'][i], arrays['periods_offset'][i + 1]
+        for home_score, away_score in zip(arrays['home_periods'][periods_start:periods_stop],
+                                          arrays['away_periods'][periods_start:periods_stop]):
+            m.add_period_scores(int(home_score), int(away_score))
+        return m
+
+    def get_matches_from_round(self, championship_round: str | int) -> List[Match]:
+
+        if type(championship_round) is int:
+            championship_round = "ROUND " + str(championship_round)
+
+        round_id = self.archive.round_ids.get(championship_round)
+        if round_id is None:
+            return []
+        return [self.get_match(int(i)) for i in np.flatnonzero(self._round == round_id)]
+
+    def get_last_round_number(self) -> int:
+        if len(self._round) == 0:
+            return 0
+        return int(self.archive.round_numbers[self._round].max())
+
+    def _reset_standings_cache(self) -> None:
+        teams_count = len(self._team_ids)
+        self._chronological_order = np.argsort(self._date, kind='stable')
+        self._chronological_dates = self._date[self._chronological_order]
+        self._cached_limit_date: Optional[np.datetime64] = None
+        self._applied_matches = 0
+        # points, games, scored and conceded of each team
+        self._cumulative_standings = np.zeros((4, teams_count), dtype=np.int64)
+        # points, scored and conceded of each team (row) against each opponent (column)
+        self._head_to_head = np.zeros((3, teams_count, teams_count), dtype=np.int64)
+
+    def _advance_standings(self, limit_date: np.datetime64) -> None:
+        """
+        Array version of Championship._advance_standings(): only the matches played between the previous
+        and the new limit_date are added to the cumulative standings and the head-to-head tables.
+        """
+        if self._cached_limit_date is not None and limit_date < self._cached_limit_date:
+            self._reset_standings_cache()
+
+        self._cached_limit_date = limit_date
+        applied_matches = int(np.searchsorted(self._chronological_dates, limit_date, side='right'))
+        new_matches = self._chronological_order[self._applied_matches:applied_matches]
+        self._applied_matches = applied_matches
+        if len(new_matches) == 0:
+            return
+
+        home_team, away_team = self._local_home_team[new_matches], self._local_away_team[new_matches]
+        home_points, away_points = self._home_points[new_matches], self._away_points[new_matches]
+        home_score, away_score = self._home_total_score[new_matches], self._away_total_score[new_matches]
+        for team, opponent, points, scored, conceded in (
+                (home_team, away_team, home_points, home_score, away_score),
+                (away_team, home_team, away_points, away_score, home_score),
+        ):
+            np.add.at(self._cumulative_standings, (slice(None), team),
+                      np.vstack((points, np.ones_like(points), scored, conceded)))
+            np.add.at(self._head_to_head, (slice(None), team, opponent), np.vstack((points, scored, conceded)))
+
+    def compute_standings_before_round(self, championship_round: int) -> Dict[str, Dict[str, int]]:
+
+        previous_round_matches = self.get_matches_from_round(championship_round - 1)
+        limit_date = self.get_last_match_date_from_round(previous_round_matches)
+        if limit_date is None:
+            # np.datetime64(None) is NaT, which would count every match of the season
+            raise Exception(f'{self.championship_data_file}: Cannot compute standings before round '
+                            f'{championship_round}: round {championship_round - 1} has no matches.')
+
+        # all matches played before the limit_date will be taken into consideration
+        self._advance_standings(np.datetime64(limit_date, 's'))
+
+        points, games, scored, conceded = self._cumulative_standings
+        standings = {
+            self.archive.teams[team_id]: {
+                "points": int(points[i]),
+                "games": int(games[i]),
+                "scored": int(scored[i]),
+                "conceded": int(conceded[i]),
+            }
+            for i, team_id in enumerate(self._team_ids)
+            if games[i] != 0
+        }
+
+        def head_to_head(team: str, opponent: str) -> Tuple[int, int, int]:
+            team_id, opponent_id = self._local_team_ids[team], self._local_team_ids[opponent]
+            return tuple(int(value) for value in self._head_to_head[:, team_id, opponent_id])
+
+        return self.rank_standings(standings, self.sport, head_to_head)
+
+
+# the archive attached by the current worker process, see attach_worker()
+_worker_archive: Optional[SharedArchive] = None
+
+
+def attach_worker(handle: Dict) -> None:
+    """
+    Process pool initializer attaching the worker to the shared archive.
+    """
+    global _worker_archive
+    _worker_archive = SharedArchive.attach(handle)
+
+
+def get_worker_archive() -> SharedArchive:
+    if _worker_archive is None:
+        raise Exception('No shared archive attached. Please use attach_worker() as the process pool initializer.')
+    return _worker_archive
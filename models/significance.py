@@ -0,0 +1,451 @@
+import os
+import concurrent.futures
+from collections import defaultdict
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+
+from models.championship import Championship
+from models.match_io import CorruptedDataFileError, is_match_data_file, match_data_file_stem
+
+NULL_MODELS = ('strength', 'permutation')
+
+
+class SeasonArrays:
+    """
+    Columnar (NumPy) view of a championship, tailored for recomputing the best-vs-worst teams statistic
+    on thousands of simulated seasons at once.
+
+    Teams are indexed in order of their first appearance in the championship matches, which replicates
+    the ordering used by Championship.compute_standings_before_round() for teams that remain level
+    after the tie-breaking criteria.
+    """
+
+    # outcome encoding, seen from the home team perspective
+    HOME_WIN = 1
+    DRAW = 0
+    AWAY_WIN = -1
+
+    def __init__(self, championship: Championship, stabilization_round: int, last_round_of_interest: int):
+        matches = championship.matches
+        if len(matches) == 0:
+            raise Exception(f'{championship.championship_data_file}: No match found. Please load the matches first.')
+
+        self.sport = matches[0].sport
+
+        team_ids: Dict[str, int] = {}
+        for match in matches:
+            team_ids.setdefault(match.home_team, len(team_ids))
+            team_ids.setdefault(match.away_team, len(team_ids))
+        self.teams: List[str] = list(team_ids.keys())
+
+        self.home_team = np.array([team_ids[match.home_team] for match in matches], dtype=np.intp)
+        self.away_team = np.array([team_ids[match.away_team] for match in matches], dtype=np.intp)
+
+        self.home_score = np.array([match.home_total_score for match in matches], dtype=np.float64)
+        self.away_score = np.array([match.away_total_score for match in matches], dtype=np.float64)
+        self.outcome = np.sign(self.home_score - self.away_score).astype(np.int8)
+
+        # observed points use the full point system (e.g. volleyball 3-2 matches)
+        points = np.array([match.compute_points() for match in matches], dtype=np.float64)
+        self.home_points = points[:, 0]
+        self.away_points = points[:, 1]
+
+        # one-hot incidence matrices (matches x teams) used to aggregate points per team
+        teams_count = len(self.teams)
+        self.home_incidence = np.zeros((len(matches), teams_count))
+        self.home_incidence[np.arange(len(matches)), self.home_team] = 1
+        self.away_incidence = np.zeros((len(matches), teams_count))
+        self.away_incidence[np.arange(len(matches)), self.away_team] = 1
+
+        # for each round of interest: the matches counted in the standings before the round (as a weight
+        # vector), the games played by each team up to that point and the indices of the round matches
+        dates = np.array([match.date for match in matches], dtype='datetime64[s]')
+        self.rounds: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for current_round in range(stabilization_round + 1, last_round_of_interest + 1):
+            limit_date = championship.get_last_match_date_from_round(
+                championship.get_matches_from_round(current_round - 1)
+            )
+            if limit_date is None:
+                continue
+            standings_mask = (dates <= np.datetime64(limit_date, 's')).astype(np.float64)
+            games = standings_mask @ self.home_incidence + standings_mask @ self.away_incidence
+            round_indices = np.array(
+                [i for i, match in enumerate(matches) if match.round == f'ROUND {current_round}'], dtype=np.intp
+            )
+            self.rounds.append((standings_mask, games, round_indices))
+
+    def resample_results(
+            self,
+            rng: np.random.Generator,
+            outcomes: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gives every match of a (simulations x matches) outcome matrix the points and scores of an observed match
+        of the season with the same outcome, drawn at random. An outcome never observed (e.g. no away win)
+        takes the mirrored result of an observed match with the opposite outcome.
+
+        Returns the home points, away points, home score and away score matrices.
+        """
+        observed = (self.home_points, self.away_points, self.home_score, self.away_score)
+        results = tuple(np.zeros(outcomes.shape) for _ in observed)
+        for outcome in (self.HOME_WIN, self.DRAW, self.AWAY_WIN):
+            simulated = outcomes == outcome
+            simulated_count = np.count_nonzero(simulated)
+            if simulated_count == 0:
+                continue
+
+            pool, sources = np.flatnonzero(self.outcome == outcome), observed
+            if len(pool) == 0:
+                # only wins can be simulated without being observed (see strength_model_probabilities())
+                pool, sources = np.flatnonzero(self.outcome == -outcome), (
+                    self.away_points, self.home_points, self.away_score, self.home_score
+                )
+            picks = pool[rng.integers(len(pool), size=simulated_count)]
+            for result, source in zip(results, sources):
+                result[simulated] = source[picks]
+        return results
+
+    def best_vs_worst_counts(
+            self,
+            outcomes: np.ndarray,
+            home_points: np.ndarray,
+            away_points: np.ndarray,
+            best_teams_number: int,
+            worst_teams_number: int,
+            home_score: Optional[np.ndarray] = None,
+            away_score: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized equivalent of Championship.compute_victories_and_defeats_for_the_best_m_teams_against_the_worst_n_teams()
+        computed for every simulated season (row) of the outcomes matrix.
+
+        Teams with the same points per game are ranked with the tie-breaking criteria of the sport
+        (Championship.TIE_BREAKERS). Unless home_score and away_score are given, the score based criteria
+        are all equal and only the head-to-head points break the ties.
+
+        Returns the wins, defeats and draws of the best teams, one value per simulated season.
+        """
+        simulations_count, teams_count = outcomes.shape[0], len(self.teams)
+        wins = np.zeros(simulations_count, dtype=np.int64)
+        defeats = np.zeros(simulations_count, dtype=np.int64)
+        draws = np.zeros(simulations_count, dtype=np.int64)
+
+        criteria = Championship.TIE_BREAKERS.get(self.sport, ())
+        has_scores = home_score is not None and away_score is not None
+        if has_scores:
+            home_score_difference = (home_score - away_score).astype(np.float64)
+
+        # head-to-head tables (simulation x team x opponent), accumulated as the standings date advances
+        head_to_head_points = np.zeros((simulations_count, teams_count, teams_count))
+        head_to_head_difference = np.zeros((simulations_count, teams_count, teams_count))
+        accumulated_mask = np.zeros(len(self.outcome))
+        team_order = np.broadcast_to(np.arange(teams_count), (simulations_count, teams_count))
+
+        for standings_mask, games, round_indices in self.rounds:
+            if len(round_indices) == 0:
+                continue
+
+            points = (home_points * standings_mask) @ self.home_incidence + \
+                     (away_points * standings_mask) @ self.away_incidence
+            played = games > 0
+            points_per_game = np.where(played, points / np.where(played, games, 1), -np.inf)
+
+            if (standings_mask < accumulated_mask).any():
+                head_to_head_points[...] = 0
+                head_to_head_difference[...] = 0
+                accumulated_mask[...] = 0
+            new_matches = np.flatnonzero(standings_mask > accumulated_mask)
+            accumulated_mask = standings_mask
+            home_team, away_team = self.home_team[new_matches], self.away_team[new_matches]
+            np.add.at(head_to_head_points, (slice(None), home_team, away_team), home_points[:, new_matches])
+            np.add.at(head_to_head_points, (slice(None), away_team, home_team), away_points[:, new_matches])
+            if has_scores:
+                np.add.at(head_to_head_difference, (slice(None), home_team, away_team),
+                          home_score_difference[:, new_matches])
+                np.add.at(head_to_head_difference, (slice(None), away_team, home_team),
+                          -home_score_difference[:, new_matches])
+
+            # mini-tables of the teams against the other teams with the same points per game
+            tied = (points_per_game[:, :, np.newaxis] == points_per_game[:, np.newaxis, :]) & \
+                played[np.newaxis, :, np.newaxis] & played[np.newaxis, np.newaxis, :] & \
+                ~np.eye(teams_count, dtype=bool)
+            criteria_values = {
+                Championship.HEAD_TO_HEAD_POINTS: (head_to_head_points * tied).sum(axis=2),
+                Championship.HEAD_TO_HEAD_DIFFERENCE: (head_to_head_difference * tied).sum(axis=2),
+            }
+            if has_scores:
+                criteria_values[Championship.SCORE_DIFFERENCE] = \
+                    (home_score_difference * standings_mask) @ (self.home_incidence - self.away_incidence)
+                criteria_values[Championship.POINTS_SCORED] = \
+                    (home_score * standings_mask) @ self.home_incidence + \
+                    (away_score * standings_mask) @ self.away_incidence
+            else:
+                criteria_values[Championship.SCORE_DIFFERENCE] = criteria_values[Championship.POINTS_SCORED] = \
+                    np.zeros((simulations_count, teams_count))
+
+            # np.lexsort uses the last key as the primary one; teams still level keep their first appearance order
+            ranking = np.lexsort(
+                [team_order] +
+                [-criteria_values[criterion] for criterion in reversed(criteria)] +
+                [-points_per_game],
+                axis=1
+            )
+            ranked_teams_count = int(played.sum())
+            best_teams = np.zeros(points.shape, dtype=bool)
+            worst_teams = np.zeros(points.shape, dtype=bool)
+            np.put_along_axis(best_teams, ranking[:, :min(best_teams_number, ranked_teams_count)], True, axis=1)
+            np.put_along_axis(
+                worst_teams,
+                ranking[:, ranked_teams_count - min(worst_teams_number, ranked_teams_count):ranked_teams_count],
+                True, axis=1
+            )
+
+            home_team = self.home_team[round_indices]
+            away_team = self.away_team[round_indices]
+            best_home, best_away = best_teams[:, home_team], best_teams[:, away_team]
+            worst_home, worst_away = worst_teams[:, home_team], worst_teams[:, away_team]
+
+            qualified = (best_home & worst_away) | (worst_home & best_away)
+            round_outcomes = outcomes[:, round_indices]
+            home_won = round_outcomes == self.HOME_WIN
+            away_won = round_outcomes == self.AWAY_WIN
+            winner_is_best = (home_won & best_home) | (away_won & best_away)
+            winner_is_worst = (home_won & worst_home) | (away_won & worst_away)
+
+            wins += (qualified & winner_is_best).sum(axis=1)
+            defeats += (qualified & ~winner_is_best & winner_is_worst).sum(axis=1)
+            draws += (qualified & ~winner_is_best & ~winner_is_worst).sum(axis=1)
+
+        return wins, defeats, draws
+
+    def observed_counts(self, best_teams_number: int, worst_teams_number: int) -> Tuple[int, int, int]:
+        wins, defeats, draws = self.best_vs_worst_counts(
+            self.outcome[np.newaxis, :],
+            self.home_points[np.newaxis, :],
+            self.away_points[np.newaxis, :],
+            best_teams_number,
+            worst_teams_number,
+            self.home_score[np.newaxis, :],
+            self.away_score[np.newaxis, :],
+        )
+        return int(wins[0]), int(defeats[0]), int(draws[0])
+
+    def strength_model_probabilities(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estimates the home win and draw probabilities of every match under a null model made of
+        a common home advantage plus a team strength derived from the season standings:
+
+            P(home wins | no draw) = sigmoid(home_advantage + strength[home_team] - strength[away_team])
+
+        The home advantage is the log-odds of a home victory among decided matches, while each team
+        strength is the log-odds of its (smoothed) season win rate, draws counting as half a victory.
+        """
+        decided = self.outcome != self.DRAW
+        home_wins = np.count_nonzero(self.outcome == self.HOME_WIN)
+        home_share = (home_wins + 1) / (np.count_nonzero(decided) + 2)
+        home_advantage = np.log(home_share / (1 - home_share))
+
+        teams_count = len(self.teams)
+        games = np.bincount(self.home_team, minlength=teams_count) + \
+            np.bincount(self.away_team, minlength=teams_count)
+        home_score = np.where(self.outcome == self.HOME_WIN, 1.0, np.where(decided, 0.0, 0.5))
+        score = np.bincount(self.home_team, weights=home_score, minlength=teams_count) + \
+            np.bincount(self.away_team, weights=1 - home_score, minlength=teams_count)
+        win_rate = (score + 1) / (games + 2)
+        strength = np.log(win_rate / (1 - win_rate))
+        strength -= strength.mean()
+
+        draw_rate = 1 - np.count_nonzero(decided) / len(self.outcome)
+        home_win = 1 / (1 + np.exp(-(home_advantage + strength[self.home_team] - strength[self.away_team])))
+        return (1 - draw_rate) * home_win, np.full(len(self.outcome), draw_rate)
+
+    def simulate_seasons(
+            self,
+            rng: np.random.Generator,
+            simulations_count: int,
+            null_model: str,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Generates (simulations x matches) outcome, home/away points and home/away score matrices under
+        the given null model, so the simulated seasons are ranked with the same criteria as the observed one:
+         - 'strength': outcomes are drawn from strength_model_probabilities(), then the points and scores
+           are resampled from the observed matches with the same outcome (see resample_results())
+         - 'permutation': the observed results (outcome, points and scores of a match together) are shuffled
+           between the season matches, which keeps the home advantage and the draw rate but removes any team strength
+        """
+        if null_model == 'strength':
+            home_win, draw = self.strength_model_probabilities()
+            uniform = rng.random((simulations_count, len(self.outcome)))
+            outcomes = np.where(uniform < home_win, self.HOME_WIN,
+                                np.where(uniform < home_win + draw, self.DRAW, self.AWAY_WIN)).astype(np.int8)
+            return outcomes, *self.resample_results(rng, outcomes)
+        if null_model == 'permutation':
+            results = rng.permuted(np.tile(np.arange(len(self.outcome)), (simulations_count, 1)), axis=1)
+            return (self.outcome[results], self.home_points[results], self.away_points[results],
+                    self.home_score[results], self.away_score[results])
+
+        raise Exception(f'Null model "{null_model}" not supported. Please use one of {NULL_MODELS}.')
+
+
+def simulate_championship(
+        championship_data_file: str,
+        seed: np.random.SeedSequence,
+        simulations_count: int,
+        batch_size: int,
+        null_model: str,
+        best_teams_number: int,
+        worst_teams_number: int,
+        stabilization_round: int,
+) -> Optional[Dict]:
+    """
+    Loads a championship and computes the best-vs-worst teams statistic on its observed season and on
+    simulations_count simulated seasons, generated in batches of batch_size seasons.
+
+    Returns None if the championship data file is corrupted or does not pass validation.
+    """
+    championship = Championship(championship_data_file)
+    try:
+        championship.load_matches()
+    except CorruptedDataFileError:
+        return None
+    if championship.validate() != "":
+        return None
+
+    season = SeasonArrays(championship, stabilization_round, championship.get_last_round_number())
+    rng = np.random.default_rng(seed)
+
+    simulated_wins = np.zeros(simulations_count, dtype=np.int64)
+    simulated_totals = np.zeros(simulations_count, dtype=np.int64)
+    for start in range(0, simulations_count, batch_size):
+        stop = min(start + batch_size, simulations_count)
+        outcomes, home_points, away_points, home_score, away_score = season.simulate_seasons(
+            rng, stop - start, null_model
+        )
+        wins, defeats, draws = season.best_vs_worst_counts(
+            outcomes, home_points, away_points, best_teams_number, worst_teams_number, home_score, away_score
+        )
+        simulated_wins[start:stop] = wins
+        simulated_totals[start:stop] = wins + defeats + draws
+
+    return {
+        'file': championship_data_file,
+        'observed': season.observed_counts(best_teams_number, worst_teams_number),
+        'simulated_wins': simulated_wins,
+        'simulated_totals': simulated_totals,
+    }
+
+
+class SignificanceEngine:
+    """
+    Monte Carlo significance test for the win rate of the best teams against the worst teams.
+
+    Every championship file is simulated in a separate process with its own child seed, so the results
+    only depend on the seed and on the set of files, not on the number of workers.
+    Since the simulated seasons are independent across championships, the i-th simulated season of every
+    championship is summed up to obtain the i-th simulated value of a league or of the overall statistic.
+    """
+
+    def __init__(
+            self,
+            simulations_count: int = 10000,
+            seed: int = 0,
+            null_model: str = 'strength',
+            batch_size: int = 1000,
+            workers: Optional[int] = None,
+            confidence_level: float = 0.95,
+    ):
+        if null_model not in NULL_MODELS:
+            raise Exception(f'Null model "{null_model}" not supported. Please use one of {NULL_MODELS}.')
+        self.simulations_count = simulations_count
+        self.seed = seed
+        self.null_model = null_model
+        self.batch_size = batch_size
+        self.workers = workers
+        self.confidence_level = confidence_level
+
+    def run(
+            self,
+            sport_data_dir: str,
+            best_teams_number: int = 3,
+            worst_teams_number: int = 3,
+            stabilization_round: int = 7,
+    ) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        Simulates every championship found in sport_data_dir (<season>/<league>.csv).
+
+        Returns the statistics by championship, by league and overall, and the list of files skipped
+        because they are corrupted or because of data validation errors.
+        """
+        data_files = sorted(
+            os.path.join(sport_data_dir, season_data, file)
+            for season_data in os.listdir(sport_data_dir)
+            for file in os.listdir(os.path.join(sport_data_dir, season_data))
+            if is_match_data_file(file)
+        )
+        seeds = np.random.SeedSequence(self.seed).spawn(len(data_files))
+
+        results: List[Dict] = []
+        skipped_files: List[str] = []
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(
+                    simulate_championship, data_file, seed, self.simulations_count, self.batch_size,
+                    self.null_model, best_teams_number, worst_teams_number, stabilization_round
+                ): data_file
+                for data_file, seed in zip(data_files, seeds)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                if result is None:
+                    skipped_files.append(futures[future])
+                else:
+                    results.append(result)
+
+        results.sort(key=lambda item: item['file'])
+        leagues = defaultdict(list)
+        for result in results:
+            leagues[match_data_file_stem(result['file'])].append(result)
+
+        stats = {os.path.relpath(result['file'], sport_data_dir): self.summarize([result]) for result in results}
+        for league in sorted(leagues.keys()):
+            stats[f'league {league}'] = self.summarize(leagues[league])
+        if len(results) > 0:
+            stats['overall'] = self.summarize(results)
+
+        return stats, sorted(skipped_files)
+
+    def summarize(self, results: List[Dict]) -> Dict:
+        """
+        Aggregates the observed and simulated statistics of the given championships into:
+         - the observed wins, defeats, draws and win rate of the best teams,
+         - the mean and the central confidence interval of the win rate under the null model,
+         - the one-sided p-value of observing a win rate at least as high under the null model.
+        """
+        observed = np.sum([result['observed'] for result in results], axis=0)
+        observed_total = int(observed.sum())
+        simulated_wins = np.sum([result['simulated_wins'] for result in results], axis=0)
+        simulated_totals = np.sum([result['simulated_totals'] for result in results], axis=0)
+
+        valid = simulated_totals > 0
+        simulated_rates = simulated_wins[valid] / simulated_totals[valid]
+        observed_rate = observed[0] / observed_total if observed_total > 0 else float('nan')
+
+        if len(simulated_rates) == 0 or observed_total == 0:
+            null_mean, interval, p_value = float('nan'), (float('nan'), float('nan')), float('nan')
+        else:
+            alpha = (1 - self.confidence_level) / 2
+            null_mean = float(simulated_rates.mean())
+            interval = tuple(float(q) for q in np.quantile(simulated_rates, [alpha, 1 - alpha]))
+            p_value = (1 + np.count_nonzero(simulated_rates >= observed_rate)) / (1 + len(simulated_rates))
+
+        return {
+            'wins': int(observed[0]),
+            'defeats': int(observed[1]),
+            'draws': int(observed[2]),
+            'win_rate': observed_rate,
+            'null_mean': null_mean,
+            'null_interval': interval,
+            'p_value': float(p_value),
+            'simulations': int(valid.sum()),
+        }
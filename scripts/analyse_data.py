@@ -4,6 +4,7 @@ import sys
 from typing import List, Tuple
 
 from models.championship import Championship
+from models.match_io import CorruptedDataFileError, is_match_data_file
 
 
 def get_seasons(desired_start_year: int) -> List[str]:
@@ -49,6 +50,9 @@ def main():
             season_data_dir = os.path.join(sport_data_dir, season_data)
 
             for file in os.listdir(season_data_dir):
+                # skip the files stored next to the championship data (e.g. features, manifests)
+                if not is_match_data_file(file):
+                    continue
 
                 # if ('germany-bbl' in file or 'italy-lega-a' in file) and season_data == "2019-2020":
                 #     continue
@@ -58,8 +62,13 @@ def main():
 
                 championship_data_fpath = os.path.join(season_data_dir, file)
                 championship = Championship(championship_data_fpath)
-                championship.load_matches()
                 data_files_count += 1
+                try:
+                    championship.load_matches()
+                except CorruptedDataFileError as e:
+                    problematic_files_count += 1
+                    pf.write(f'!!! [Corrupted Data File] {e} !!!\n')
+                    continue
 
                 validation_result = championship.validate()
                 if validation_result != "":
@@ -0,0 +1,92 @@
+import argparse
+import os
+import sys
+import concurrent.futures
+from typing import Dict, Tuple
+
+from models.shared_archive import SharedArchive, attach_worker, get_worker_archive
+
+
+def parse_input() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Compute the best teams results against the worst teams for several group sizes in parallel, '
+                    'sharing a single in-memory copy of the sport directory between the worker processes'
+    )
+
+    parser.add_argument('--sport_dir', type=str, required=True, help='Sport specific directory')
+    parser.add_argument('--outfile', type=str, required=True, help='Output file with statistics')
+    parser.add_argument('--teams_numbers', type=int, nargs='+', default=[3],
+                        help='Numbers of best/worst teams to compare (e.g. 2 3 4)')
+    parser.add_argument('--stabilization_round', type=int, default=7, help='Stabilization round')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+
+    args = parser.parse_args()
+    if not os.path.exists(args.sport_dir):
+        print(f'Error: Input data directory {args.sport_dir} does not exist.', file=sys.stderr)
+        sys.exit(1)
+
+    return args
+
+
+def analyse_championship(index: int, teams_number: int, stabilization_round: int) -> Tuple[str, Dict[str, int]]:
+    """
+    Runs in a worker process, on the championship views of the shared archive.
+    """
+    championship = get_worker_archive().get_championship(index)
+    validation_result = championship.validate()
+    if validation_result != "":
+        return validation_result, {}
+
+    top_teams_stats, _ = championship.compute_victories_and_defeats_for_the_best_m_teams_against_the_worst_n_teams(
+        best_teams_number=teams_number,
+        worst_teams_number=teams_number,
+        stabilization_round=stabilization_round,
+        last_round_of_interest=championship.get_last_round_number()
+    )
+    return "", top_teams_stats
+
+
+def main():
+    args = parse_input()
+
+    with SharedArchive.create(args.sport_dir) as archive, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=args.workers, initializer=attach_worker,
+                                                   initargs=(archive.handle(),)) as executor:
+        futures = {
+            executor.submit(analyse_championship, index, teams_number, args.stabilization_round): teams_number
+            for teams_number in args.teams_numbers
+            for index in range(len(archive.championships))
+        }
+
+        all_stats = {teams_number: {'wins': 0, 'defeats': 0, 'draws': 0} for teams_number in args.teams_numbers}
+        validation_errors = set()
+        for future in concurrent.futures.as_completed(futures):
+            validation_result, top_teams_stats = future.result()
+            if validation_result != "":
+                validation_errors.add(validation_result)
+                continue
+            for outcome, count in top_teams_stats.items():
+                all_stats[futures[future]][outcome] += count
+        corrupted_files = archive.corrupted_files
+
+    with open(args.outfile, 'w+', encoding='utf-8') as f:
+        for teams_number, stats in all_stats.items():
+            games = sum(stats.values())
+            win_rate = stats['wins'] / games if games > 0 else float('nan')
+            f.write(
+                f'Best {teams_number} teams against worst {teams_number} teams:\n'
+                f' - Total wins: {stats["wins"]}\n'
+                f' - Total defeats: {stats["defeats"]}\n'
+                f' - Total draws: {stats["draws"]}\n'
+                f' - Win rate: {win_rate:.2%}\n\n'
+            )
+        f.write(f'NOTE: Skipped {len(validation_errors)} championship(s) with data validation errors:\n')
+        for validation_result in sorted(validation_errors):
+            f.write(f'\t{validation_result}\n')
+        f.write(f'NOTE: Skipped {len(corrupted_files)} corrupted data file(s):\n')
+        for corrupted_file in corrupted_files:
+            f.write(f'\t{corrupted_file}\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+from typing import Tuple
+
+from models.championship import Championship
+from models.feature_store import TeamFeatureStore
+from models.match_io import CorruptedDataFileError, is_match_data_file
+
+
+def parse_input() -> Tuple[str, int]:
+    parser = argparse.ArgumentParser(description='Build or update the per-team rolling features of every championship')
+
+    parser.add_argument('--sport_dir', type=str, required=True, help='Sport specific directory')
+    parser.add_argument('--window', type=int, default=5, help='Number of matches used by the rolling features')
+
+    args = parser.parse_args()
+    sport_dir_path = args.sport_dir
+
+    if not os.path.exists(sport_dir_path):
+        print(f'Error: Input data directory {sport_dir_path} does not exist.', file=sys.stderr)
+        sys.exit(1)
+
+    return sport_dir_path, args.window
+
+
+def main():
+    sport_data_dir, window = parse_input()
+
+    for season_data in os.listdir(sport_data_dir):
+        season_data_dir = os.path.join(sport_data_dir, season_data)
+
+        for file in os.listdir(season_data_dir):
+            if not is_match_data_file(file):
+                continue
+
+            championship_data_fpath = os.path.join(season_data_dir, file)
+            championship = Championship(championship_data_fpath)
+            try:
+                championship.load_matches()
+            except CorruptedDataFileError as e:
+                print(f'Skipping corrupted file: {e}')
+                continue
+
+            feature_store = TeamFeatureStore.load(championship_data_fpath, window)
+            new_matches_count = feature_store.update(championship.matches)
+            if new_matches_count == 0:
+                print(f'Features of {championship_data_fpath} are up to date.')
+                continue
+
+            feature_store.save(championship_data_fpath)
+            print(f'Added {new_matches_count} match(es) to the features of {championship_data_fpath}.')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+from typing import Tuple
+
+from models.championship import Championship
+from models.feature_store import TeamFeatureStore
+from models.match_io import (
+    COMPRESSIONS, CorruptedDataFileError, write_matches, read_matches, is_match_data_file, get_compression, match_data_file_stem,
+    match_data_file_path, manifest_path
+)
+
+
+def parse_input() -> Tuple[str, str]:
+    parser = argparse.ArgumentParser(description='Rewrite the championship data files of a sport directory compressed')
+
+    parser.add_argument('--sport_dir', type=str, required=True, help='Sport specific directory')
+    parser.add_argument('--compression', type=str, default='gzip', choices=[c for c in COMPRESSIONS if c is not None],
+                        help='Compression of the rewritten files')
+
+    args = parser.parse_args()
+    sport_dir_path = args.sport_dir
+
+    if not os.path.exists(sport_dir_path):
+        print(f'Error: Input data directory {sport_dir_path} does not exist.', file=sys.stderr)
+        sys.exit(1)
+
+    return sport_dir_path, args.compression
+
+
+def main():
+    sport_data_dir, compression = parse_input()
+
+    for season_data in os.listdir(sport_data_dir):
+        season_data_dir = os.path.join(sport_data_dir, season_data)
+
+        for file in os.listdir(season_data_dir):
+            if not is_match_data_file(file) or get_compression(file) == compression:
+                continue
+
+            championship_data_fpath = os.path.join(season_data_dir, file)
+            championship = Championship(championship_data_fpath)
+            try:
+                championship.load_matches()
+            except CorruptedDataFileError as e:
+                print(f'Skipping corrupted file: {e}')
+                continue
+
+            compressed_fpath = match_data_file_path(season_data_dir, match_data_file_stem(file), compression)
+            write_matches(compressed_fpath, championship.matches)
+
+            # read the new file back (row count and checksum) before removing the original one
+            sum(1 for _ in read_matches(compressed_fpath))
+            os.remove(championship_data_fpath)
+            if os.path.isfile(manifest_path(championship_data_fpath)):
+                os.remove(manifest_path(championship_data_fpath))
+            # the features are stored next to the data file and named after it
+            for sidecar_file in (TeamFeatureStore.features_file, TeamFeatureStore.state_file):
+                if os.path.isfile(sidecar_file(championship_data_fpath)):
+                    os.replace(sidecar_file(championship_data_fpath), sidecar_file(compressed_fpath))
+
+            print(f'{championship_data_fpath} ({os.path.getsize(compressed_fpath)} bytes) -> {compressed_fpath}')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,8 @@
 import argparse
 import os
-import csv
 import sys
 import concurrent.futures
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
 from selenium import webdriver
 from selenium.webdriver.chrome.webdriver import Options as ChromeOptions
@@ -11,6 +10,7 @@ from InquirerPy import inquirer
 
 from crawler.flashscore_crawler import FlashScoreCrawler
 from models.match import Sport, Match
+from models.match_io import COMPRESSIONS, write_matches, is_complete, match_data_file_path
 
 
 def setup_crawler() -> FlashScoreCrawler:
@@ -44,14 +44,10 @@ def write_league_data(outfile: str, matches: List[Match]):
         raise Exception('No match has been provided! Please provide at least one match!')
 
     print(f'Writing crawled data to {outfile} ...')
-    with open(outfile, 'w+', encoding='utf8', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=matches[0].to_dict().keys())
-        writer.writeheader()
-        for match in matches:
-            writer.writerow(match.to_dict())
+    write_matches(outfile, matches)
 
 
-def parse_input() -> Tuple[str, str, str]:
+def parse_input() -> Tuple[str, str, str, Optional[str]]:
     parser = argparse.ArgumentParser(
         description='Read 2 file paths representing the input data and a directory path where results should be placed'
     )
@@ -60,6 +56,8 @@ def parse_input() -> Tuple[str, str, str]:
     parser.add_argument('--leagues', type=str, required=True, help='Path to the leagues file')
     parser.add_argument('--seasons', type=str, required=True, help='Path to the seasons file')
     parser.add_argument('--out_dir', type=str, required=True, help='Path to the output folder')
+    parser.add_argument('--compression', type=str, default=None, choices=[c for c in COMPRESSIONS if c is not None],
+                        help='Compression of the output files')
 
     args = parser.parse_args()
     leagues_path = args.leagues
@@ -73,7 +71,7 @@ def parse_input() -> Tuple[str, str, str]:
         print(f'Error: The seasons file path "{seasons_path}" does not exists.', file=sys.stderr)
         sys.exit(1)
 
-    return leagues_path, seasons_path, out_dir_path
+    return leagues_path, seasons_path, out_dir_path, args.compression
 
 
 def select_sport() -> Sport:
@@ -88,14 +86,14 @@ def select_sport() -> Sport:
     return Sport(selected_sport)
 
 
-def process_league(league_info: str, url: str, sport: Sport, out_dir: str) -> None:
+def process_league(league_info: str, url: str, sport: Sport, out_dir: str, compression: Optional[str] = None) -> None:
     _, league, season = league_info.split("_")
 
     league_folder = os.path.join(out_dir, sport.name.lower(), season)
     os.makedirs(league_folder, exist_ok=True)
 
-    league_outfile = os.path.join(league_folder, f'{league.replace('/', '-')}.csv')
-    if os.path.exists(league_outfile):
+    league_outfile = match_data_file_path(league_folder, league.replace('/', '-'), compression)
+    if is_complete(league_outfile):
         print(f'File {league_outfile} is on disk. Skipping crawling data ...')
         return
 
@@ -118,7 +116,7 @@ def process_league(league_info: str, url: str, sport: Sport, out_dir: str) -> No
 
 
 def main():
-    leagues_path, seasons_path, out_dir = parse_input()
+    leagues_path, seasons_path, out_dir, compression = parse_input()
     leagues = read_file_lines(leagues_path)
     seasons = read_file_lines(seasons_path)
     sport: Sport = select_sport()
@@ -127,7 +125,7 @@ def main():
 
     with concurrent.futures.ThreadPoolExecutor(max_workers=11) as executor:
         futures = [
-            executor.submit(process_league, league_info, url, sport, out_dir)
+            executor.submit(process_league, league_info, url, sport, out_dir, compression)
             for league_info, url in leagues_urls.items()
         ]
         for future in concurrent.futures.as_completed(futures):
@@ -0,0 +1,42 @@
+import argparse
+import asyncio
+import os
+import sys
+
+from service.query_service import ChampionshipQueryService, LRUCache
+
+
+def parse_input() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Serve JSON queries over the championships of a sport directory')
+
+    parser.add_argument('--sport_dir', type=str, required=True, help='Sport specific directory')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host to bind')
+    parser.add_argument('--port', type=int, default=8080, help='Port to bind')
+    parser.add_argument('--cache_entries', type=int, default=4096, help='Maximum number of cached responses')
+    parser.add_argument('--cache_mb', type=int, default=64, help='Maximum size of the cached responses (MB)')
+    parser.add_argument('--reload_interval', type=float, default=5.0, help='Seconds between data files checks')
+
+    args = parser.parse_args()
+    if not os.path.exists(args.sport_dir):
+        print(f'Error: Input data directory {args.sport_dir} does not exist.', file=sys.stderr)
+        sys.exit(1)
+
+    return args
+
+
+def main():
+    args = parse_input()
+
+    service = ChampionshipQueryService(
+        args.sport_dir,
+        cache=LRUCache(max_entries=args.cache_entries, max_bytes=args.cache_mb * 1024 * 1024),
+        reload_interval=args.reload_interval,
+    )
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+
+from models.significance import SignificanceEngine, NULL_MODELS
+
+
+def parse_input() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Monte Carlo significance test for the win rate of the best teams against the worst teams'
+    )
+
+    parser.add_argument('--sport_dir', type=str, required=True, help='Sport specific directory')
+    parser.add_argument('--outfile', type=str, required=True, help='Output file with statistics')
+    parser.add_argument('--simulations', type=int, default=10000, help='Simulated seasons per championship')
+    parser.add_argument('--null_model', type=str, default='strength', choices=NULL_MODELS, help='Null model')
+    parser.add_argument('--seed', type=int, default=0, help='Seed used for reproducible simulations')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+
+    args = parser.parse_args()
+    if not os.path.exists(args.sport_dir):
+        print(f'Error: Input data directory {args.sport_dir} does not exist.', file=sys.stderr)
+        sys.exit(1)
+
+    return args
+
+
+def main():
+    args = parse_input()
+
+    engine = SignificanceEngine(
+        simulations_count=args.simulations,
+        seed=args.seed,
+        null_model=args.null_model,
+        workers=args.workers,
+    )
+    stats, skipped_files = engine.run(
+        args.sport_dir,
+        best_teams_number=3,
+        worst_teams_number=3,
+        stabilization_round=7,
+    )
+
+    with open(args.outfile, 'w+', encoding='utf-8') as f:
+        f.write(f'Best teams win rate against worst teams - {args.simulations} simulated seasons per championship '
+                f'under the "{args.null_model}" null model (seed={args.seed}).\n\n')
+        for name, group_stats in stats.items():
+            low, high = group_stats['null_interval']
+            f.write(
+                f'{name}: {group_stats["wins"]}W-{group_stats["defeats"]}L-{group_stats["draws"]}D, '
+                f'win rate {group_stats["win_rate"]:.2%}, '
+                f'null mean {group_stats["null_mean"]:.2%}, '
+                f'{engine.confidence_level:.0%} null interval [{low:.2%}, {high:.2%}], '
+                f'p-value {group_stats["p_value"]:.4f}\n'
+            )
+
+        if len(skipped_files) > 0:
+            f.write(f'\nNOTE: Skipped {len(skipped_files)} file(s) that are corrupted or did not pass data validation:\n')
+            for skipped_file in skipped_files:
+                f.write(f'\t{skipped_file}\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+import os
+import json
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Callable
+from urllib.parse import urlsplit, parse_qs
+
+from models.championship import Championship
+from models.match import Match
+from models.match_io import CorruptedDataFileError, is_match_data_file, match_data_file_stem
+
+
+class QueryError(Exception):
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LRUCache:
+    """
+    Least recently used cache of encoded responses, bounded both by the number of entries and by their total size.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_in_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple, bytes] = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Tuple, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self.size_in_bytes -= len(self._entries.pop(key))
+        self._entries[key] = value
+        self.size_in_bytes += len(value)
+        while len(self._entries) > self.max_entries or self.size_in_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_in_bytes -= len(evicted)
+
+    def invalidate(self, predicate: Callable[[Tuple], bool]) -> None:
+        for key in [key for key in self._entries if predicate(key)]:
+            self.size_in_bytes -= len(self._entries.pop(key))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _match_to_json(match: Match) -> Dict:
+    match_info = match.to_dict()
+    match_info['date'] = str(match_info['date'])
+    return match_info
+
+
+class ChampionshipQueryService:
+    """
+    Asyncio HTTP service answering JSON queries over the championships of a sport directory
+    (<sport_dir>/<season>/<league>.csv, optionally compressed), loaded once in memory.
+
+    Endpoints (GET):
+        /championships
+        /standings?season=2022-2023&league=spain-acb&round=10
+        /round?season=2022-2023&league=spain-acb&round=10
+        /best-vs-worst?season=2022-2023&league=spain-acb[&best=3&worst=3&stabilization_round=7]
+        /head-to-head?league=spain-acb&team_a=Real Madrid&team_b=Barcelona[&season=2022-2023]
+
+    Responses are kept in an LRU cache. The sport directory is polled every reload_interval seconds:
+    new or modified championship files are reloaded and their cached responses are discarded.
+    """
+
+    def __init__(self, sport_data_dir: str, cache: Optional[LRUCache] = None, reload_interval: float = 5.0):
+        self.sport_data_dir = sport_data_dir
+        self.cache = cache if cache is not None else LRUCache()
+        self.reload_interval = reload_interval
+        self.championships: Dict[Tuple[str, str], Championship] = {}
+        self._modification_times: Dict[Tuple[str, str], float] = {}
+        self._routes = {
+            '/championships': self.list_championships,
+            '/standings': self.standings,
+            '/round': self.round_matches,
+            '/best-vs-worst': self.best_vs_worst,
+            '/head-to-head': self.head_to_head,
+        }
+
+    def _scan_data_files(self) -> Dict[Tuple[str, str], Tuple[str, float]]:
+        data_files = {}
+        for season_data in os.listdir(self.sport_data_dir):
+            season_data_dir = os.path.join(self.sport_data_dir, season_data)
+            if not os.path.isdir(season_data_dir):
+                continue
+            for file in os.listdir(season_data_dir):
+                if not is_match_data_file(file):
+                    continue
+                championship_data_fpath = os.path.join(season_data_dir, file)
+                data_files[(season_data, match_data_file_stem(file))] = (
+                    championship_data_fpath, os.path.getmtime(championship_data_fpath)
+                )
+        return data_files
+
+    def reload(self) -> List[Tuple[str, str]]:
+        """
+        Loads the new or modified championship files, drops the deleted ones and returns the changed championships.
+
+        The loaded championships replace the served ones in a single assignment, so reload() can run in a worker
+        thread while queries are answered. The cache must then be cleared with invalidate(changed) from the event loop.
+        """
+        data_files = self._scan_data_files()
+        championships = {key: value for key, value in self.championships.items() if key in data_files}
+        modification_times = {key: value for key, value in self._modification_times.items() if key in data_files}
+        changed = [key for key in self.championships if key not in data_files]
+
+        for key, (championship_data_fpath, modification_time) in data_files.items():
+            if modification_times.get(key) == modification_time:
+                continue
+            championship = Championship(championship_data_fpath)
+            try:
+                championship.load_matches()
+            except CorruptedDataFileError as e:
+                # keep serving the previously loaded version, if any; the file is retried at the next reload
+                print(f'Skipping corrupted file: {e}')
+                continue
+            championships[key] = championship
+            modification_times[key] = modification_time
+            changed.append(key)
+
+        self.championships, self._modification_times = championships, modification_times
+        return changed
+
+    def invalidate(self, changed: List[Tuple[str, str]]) -> None:
+        if len(changed) == 0:
+            return
+        changed_keys = set(changed)
+        changed_leagues = {league for _, league in changed}
+        # cache keys are (endpoint, season, league, ...); head-to-head keys may span all seasons (season=None)
+        self.cache.invalidate(
+            lambda cache_key: cache_key[0] == '/championships' or (cache_key[1], cache_key[2]) in changed_keys
+            or (cache_key[1] is None and cache_key[2] in changed_leagues)
+        )
+
+    async def watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                changed = await loop.run_in_executor(None, self.reload)
+                self.invalidate(changed)
+                if len(changed) > 0:
+                    print(f'Reloaded {len(changed)} championship(s): {changed}')
+            except Exception as e:
+                print(f'Reloading error: {e}')
+
+    @staticmethod
+    def _get_param(params: Dict[str, List[str]], name: str, default: Optional[str] = None) -> str:
+        if name in params:
+            return params[name][0]
+        if default is None:
+            raise QueryError(400, f'Missing query parameter "{name}".')
+        return default
+
+    @staticmethod
+    def _get_int_param(params: Dict[str, List[str]], name: str, default: Optional[int] = None) -> int:
+        value = ChampionshipQueryService._get_param(params, name, None if default is None else str(default))
+        try:
+            return int(value)
+        except ValueError:
+            raise QueryError(400, f'Query parameter "{name}" must be an integer. Got "{value}".')
+
+    def _get_championship(self, params: Dict[str, List[str]]) -> Tuple[Tuple[str, str], Championship]:
+        key = (self._get_param(params, 'season'), self._get_param(params, 'league'))
+        if key not in self.championships:
+            raise QueryError(404, f'Championship {key[1]} ({key[0]}) not found.')
+        return key, self.championships[key]
+
+    def list_championships(self, params: Dict[str, List[str]]) -> Tuple[Tuple, Callable[[], Dict]]:
+        def compute() -> Dict:
+            return {
+                'championships': [
+                    {'season': season, 'league': league, 'last_round': championship.get_last_round_number()}
+                    for (season, league), championship in sorted(self.championships.items())
+                ]
+            }
+        return ('/championships', None, None), compute
+
+    def standings(self, params: Dict[str, List[str]]) -> Tuple[Tuple, Callable[[], Dict]]:
+        (season, league), championship = self._get_championship(params)
+        championship_round = self._get_int_param(params, 'round')
+        cache_key = ('/standings', season, league, championship_round)
+
+        def compute() -> Dict:
+            if len(championship.get_matches_from_round(championship_round - 1)) == 0:
+                raise QueryError(400, f'Cannot compute standings before round {championship_round}: '
+                                      f'round {championship_round - 1} has no matches.')
+            standings = championship.compute_standings_before_round(championship_round)
+            return {
+                'season': season,
+                'league': league,
+                'round': championship_round,
+                'standings': [{'team': team, **team_stats} for team, team_stats in standings.items()],
+            }
+        return cache_key, compute
+
+    def round_matches(self, params: Dict[str, List[str]]) -> Tuple[Tuple, Callable[[], Dict]]:
+        (season, league), championship = self._get_championship(params)
+        championship_round = self._get_int_param(params, 'round')
+        cache_key = ('/round', season, league, championship_round)
+
+        def compute() -> Dict:
+            return {
+                'season': season,
+                'league': league,
+                'round': championship_round,
+                'matches': [_match_to_json(match) for match in championship.get_matches_from_round(championship_round)],
+            }
+        return cache_key, compute
+
+    def best_vs_worst(self, params: Dict[str, List[str]]) -> Tuple[Tuple, Callable[[], Dict]]:
+        (season, league), championship = self._get_championship(params)
+        best_teams_number = self._get_int_param(params, 'best', 3)
+        worst_teams_number = self._get_int_param(params, 'worst', 3)
+        stabilization_round = self._get_int_param(params, 'stabilization_round', 7)
+        for name, value in (
+                ('best', best_teams_number), ('worst', worst_teams_number), ('stabilization_round', stabilization_round)
+        ):
+            if value < 1:
+                raise QueryError(400, f'Query parameter "{name}" must be greater than 0.')
+        cache_key = ('/best-vs-worst', season, league, best_teams_number, worst_teams_number, stabilization_round)
+
+        def compute() -> Dict:
+            best_teams_stats, best_teams_matches = (
+                championship.compute_victories_and_defeats_for_the_best_m_teams_against_the_worst_n_teams(
+                    best_teams_number=best_teams_number,
+                    worst_teams_number=worst_teams_number,
+                    stabilization_round=stabilization_round,
+                    last_round_of_interest=championship.get_last_round_number()
+                ))
+            return {
+                'season': season,
+                'league': league,
+                'stats': best_teams_stats,
+                'matches': {
+                    outcome_details: [_match_to_json(match) for match in matches]
+                    for outcome_details, matches in best_teams_matches.items()
+                },
+            }
+        return cache_key, compute
+
+    def head_to_head(self, params: Dict[str, List[str]]) -> Tuple[Tuple, Callable[[], Dict]]:
+        league = self._get_param(params, 'league')
+        season = params['season'][0] if 'season' in params else None
+        team_a, team_b = self._get_param(params, 'team_a'), self._get_param(params, 'team_b')
+        cache_key = ('/head-to-head', season, league, team_a, team_b)
+
+        def compute() -> Dict:
+            championships = [
+                championship for (championship_season, championship_league), championship
+                in sorted(self.championships.items())
+                if championship_league == league and (season is None or championship_season == season)
+            ]
+            if len(championships) == 0:
+                raise QueryError(404, f'Championship {league} ({season or "all seasons"}) not found.')
+
+            stats = {team_a: 0, team_b: 0, Match.draw(): 0}
+            matches = []
+            for championship in championships:
+                for match in championship.matches:
+                    if {match.home_team, match.away_team} == {team_a, team_b}:
+                        stats[match.get_winner()] += 1
+                        matches.append(match)
+            matches.sort(key=lambda match: match.date)
+            return {
+                'league': league,
+                'season': season,
+                'stats': stats,
+                'matches': [_match_to_json(match) for match in matches],
+            }
+        return cache_key, compute
+
+    def query(self, target: str) -> bytes:
+        """
+        Answers a request target (path and query string) with an encoded JSON body, using the cache when possible.
+        """
+        url = urlsplit(target)
+        if url.path not in self._routes:
+            raise QueryError(404, f'Unknown endpoint {url.path}.')
+
+        cache_key, compute = self._routes[url.path](parse_qs(url.query))
+        body = self.cache.get(cache_key)
+        if body is None:
+            body = json.dumps(compute()).encode('utf-8')
+            self.cache.put(cache_key, body)
+        return body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                connection = None
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    if name.strip().lower() == 'connection':
+                        connection = value.strip().lower()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    status, body = 400, json.dumps({'error': 'Malformed request.'}).encode('utf-8')
+                    keep_alive = False
+                else:
+                    # HTTP/1.1 connections are persistent by default, HTTP/1.0 ones only on request
+                    if version.strip() == 'HTTP/1.0':
+                        keep_alive = connection == 'keep-alive'
+                    else:
+                        keep_alive = connection != 'close'
+                    try:
+                        if method != 'GET':
+                            raise QueryError(405, f'Method {method} not allowed.')
+                        status, body = 200, self.query(target)
+                    except QueryError as e:
+                        status, body = e.status, json.dumps({'error': str(e)}).encode('utf-8')
+                    except Exception as e:
+                        status, body = 500, json.dumps({'error': str(e)}).encode('utf-8')
+
+                writer.write(
+                    f'HTTP/1.1 {status} {_STATUS_REASONS.get(status, "Error")}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode('latin-1') + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        loop = asyncio.get_running_loop()
+        self.invalidate(await loop.run_in_executor(None, self.reload))
+        print(f'Loaded {len(self.championships)} championship(s) from {self.sport_data_dir}.')
+
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        watcher = asyncio.create_task(self.watch())
+        print(f'Serving on http://{host}:{port}')
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+_STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}